@@ -7,93 +7,155 @@ except ImportError:
     print("Please run: pip install numpy")
     sys.exit(1)
 
-def rgb_to_lab(rgb):
+# Optional Numba kernels; fall back to the NumPy implementation without them
+try:
+    from colorspace_numba import rgb_to_lab_kernel, lab_to_rgb_kernel
+except ImportError:
+    rgb_to_lab_kernel = None
+    lab_to_rgb_kernel = None
+
+# sRGB (D65) to XYZ matrix with the D65 white point normalization folded in,
+# so a single matrix product over the channel planes yields white-normalized XYZ
+_RGB_TO_XYZ_D65 = (np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041]
+]) / np.array([[0.95047], [1.00000], [1.08883]])).astype(np.float32)
+
+# XYZ to sRGB (D65) matrix with the D65 white point denormalization folded in
+_XYZ_D65_TO_RGB = (np.array([
+    [ 3.2404542, -1.5371385, -0.4985314],
+    [-0.9692660,  1.8760108,  0.0415560],
+    [ 0.0556434, -0.2040259,  1.0572252]
+]) * np.array([[0.95047, 1.00000, 1.08883]])).astype(np.float32)
+
+# sRGB to linear RGB for every 8-bit input value
+_SRGB_TO_LINEAR = np.arange(256) / 255.0
+_SRGB_TO_LINEAR = np.where(_SRGB_TO_LINEAR > 0.04045,
+                           ((_SRGB_TO_LINEAR + 0.055) / 1.055) ** 2.4,
+                           _SRGB_TO_LINEAR / 12.92).astype(np.float32)
+
+def _to_soa(img):
+    """Transpose an (height, width, 3) image into contiguous (3, height, width) planes."""
+    return np.ascontiguousarray(img.transpose(2, 0, 1))
+
+
+def _from_soa(planes, out=None):
+    """Transpose (3, height, width) planes back into an (height, width, 3) image."""
+    if out is None:
+        out = np.empty(planes.shape[1:] + planes.shape[:1], dtype=planes.dtype)
+    out[...] = planes.transpose(1, 2, 0)
+    return out
+
+
+def rgb_to_lab(rgb, out=None):
     """
     Convert RGB to LAB color space.
     
+    Uses the fused Numba kernel when available. Otherwise the image is
+    transposed once into contiguous channel planes and all math is done in
+    float32 on preallocated buffers; piecewise steps are applied in place with
+    ufunc ``where=`` masks instead of fancy indexing.
+    
     Args:
         rgb: numpy array in range [0, 255] with shape (height, width, 3)
+        out: optional float32 array of the same shape to write the result into
     
     Returns:
-        numpy array in LAB color space
+        float32 numpy array in LAB color space
     """
-    # Normalize RGB to [0, 1]
-    rgb = rgb / 255.0
-    
-    # Apply gamma correction (sRGB to linear RGB)
-    mask = rgb > 0.04045
-    rgb[mask] = np.power((rgb[mask] + 0.055) / 1.055, 2.4)
-    rgb[~mask] = rgb[~mask] / 12.92
-    
-    # Convert to XYZ
-    # Using D65 illuminant
-    m = np.array([
-        [0.4124564, 0.3575761, 0.1804375],
-        [0.2126729, 0.7151522, 0.0721750],
-        [0.0193339, 0.1191920, 0.9503041]
-    ])
-    
-    xyz = np.dot(rgb, m.T)
-    
-    # Normalize by D65 white point
-    xyz[:, :, 0] /= 0.95047
-    xyz[:, :, 1] /= 1.00000
-    xyz[:, :, 2] /= 1.08883
+    if rgb_to_lab_kernel is not None:
+        if out is None:
+            out = np.empty(rgb.shape, dtype=np.float32)
+        rgb_to_lab_kernel(rgb, out)
+        return out
+    
+    planes = _to_soa(rgb)
+    lin = np.empty(planes.shape, dtype=np.float32)
+    
+    if planes.dtype == np.uint8:
+        # Normalize and gamma correct 8-bit input with a single table lookup
+        np.take(_SRGB_TO_LINEAR, planes, out=lin)
+    else:
+        # Normalize RGB to [0, 1]
+        np.multiply(planes, np.float32(1 / 255.0), out=lin, casting='unsafe')
+        
+        # Apply gamma correction (sRGB to linear RGB)
+        mask = lin > 0.04045
+        np.multiply(lin, np.float32(1 / 12.92), out=lin, where=~mask)
+        np.add(lin, np.float32(0.055), out=lin, where=mask)
+        np.multiply(lin, np.float32(1 / 1.055), out=lin, where=mask)
+        np.power(lin, np.float32(2.4), out=lin, where=mask)
+    
+    # Convert to white-normalized XYZ (D65 illuminant)
+    xyz = np.dot(_RGB_TO_XYZ_D65, lin.reshape(3, -1)).reshape(lin.shape)
     
     # Convert XYZ to LAB
     mask = xyz > 0.008856
-    xyz[mask] = np.power(xyz[mask], 1/3)
-    xyz[~mask] = (7.787 * xyz[~mask]) + (16/116)
-    
-    lab = np.zeros_like(xyz)
-    lab[:, :, 0] = (116 * xyz[:, :, 1]) - 16  # L
-    lab[:, :, 1] = 500 * (xyz[:, :, 0] - xyz[:, :, 1])  # a
-    lab[:, :, 2] = 200 * (xyz[:, :, 1] - xyz[:, :, 2])  # b
-    
-    return lab
+    np.cbrt(xyz, out=xyz, where=mask)
+    np.multiply(xyz, np.float32(7.787), out=xyz, where=~mask)
+    np.add(xyz, np.float32(16 / 116), out=xyz, where=~mask)
+    
+    # Reuse the linear RGB planes for the LAB result
+    fx, fy, fz = xyz
+    lab = lin
+    np.multiply(fy, np.float32(116), out=lab[0])  # L
+    lab[0] -= 16
+    np.subtract(fx, fy, out=lab[1])  # a
+    lab[1] *= 500
+    np.subtract(fy, fz, out=lab[2])  # b
+    lab[2] *= 200
+    
+    return _from_soa(lab, out)
 
 
-def lab_to_rgb(lab):
+def lab_to_rgb(lab, out=None):
     """
     Convert LAB to RGB color space.
     
+    Uses the fused Numba kernel when available. Otherwise all math is done in
+    float32 on preallocated channel planes, transposed back once at the end.
+    
     Args:
         lab: numpy array in LAB color space
+        out: optional float32 array of the same shape to write the result into
     
     Returns:
-        numpy array in range [0, 255] with shape (height, width, 3)
+        float32 numpy array in range [0, 255] with shape (height, width, 3)
     """
-    # Convert LAB to XYZ
-    fy = (lab[:, :, 0] + 16) / 116
-    fx = lab[:, :, 1] / 500 + fy
-    fz = fy - lab[:, :, 2] / 200
-    
-    xyz = np.stack([fx, fy, fz], axis=2)
-    
-    mask = xyz > 0.2068966
-    xyz[mask] = np.power(xyz[mask], 3)
-    xyz[~mask] = (xyz[~mask] - 16/116) / 7.787
-    
-    # Denormalize by D65 white point
-    xyz[:, :, 0] *= 0.95047
-    xyz[:, :, 1] *= 1.00000
-    xyz[:, :, 2] *= 1.08883
-    
-    # Convert XYZ to RGB
-    m_inv = np.array([
-        [ 3.2404542, -1.5371385, -0.4985314],
-        [-0.9692660,  1.8760108,  0.0415560],
-        [ 0.0556434, -0.2040259,  1.0572252]
-    ])
-    
-    rgb = np.dot(xyz, m_inv.T)
+    if lab_to_rgb_kernel is not None:
+        if out is None:
+            out = np.empty(lab.shape, dtype=np.float32)
+        lab_to_rgb_kernel(lab, out)
+        return out
+    
+    # Convert LAB to f(XYZ), writing each channel into its own contiguous plane
+    f = np.empty((3,) + lab.shape[:2], dtype=np.float32)
+    fx, fy, fz = f
+    np.add(lab[:, :, 0], np.float32(16), out=fy)
+    fy *= np.float32(1 / 116)
+    np.multiply(lab[:, :, 1], np.float32(1 / 500), out=fx)
+    fx += fy
+    np.multiply(lab[:, :, 2], np.float32(1 / 200), out=fz)
+    np.subtract(fy, fz, out=fz)
+    
+    mask = f > 0.2068966
+    np.power(f, np.float32(3), out=f, where=mask)
+    np.subtract(f, np.float32(16 / 116), out=f, where=~mask)
+    np.multiply(f, np.float32(1 / 7.787), out=f, where=~mask)
+    
+    # Convert white-normalized XYZ to linear RGB (D65 illuminant)
+    rgb = np.dot(_XYZ_D65_TO_RGB, f.reshape(3, -1)).reshape(f.shape)
     
     # Apply inverse gamma correction (linear RGB to sRGB)
     mask = rgb > 0.0031308
-    rgb[mask] = 1.055 * np.power(rgb[mask], 1/2.4) - 0.055
-    rgb[~mask] = 12.92 * rgb[~mask]
+    np.multiply(rgb, np.float32(12.92), out=rgb, where=~mask)
+    np.power(rgb, np.float32(1 / 2.4), out=rgb, where=mask)
+    np.multiply(rgb, np.float32(1.055), out=rgb, where=mask)
+    np.subtract(rgb, np.float32(0.055), out=rgb, where=mask)
     
     # Convert to [0, 255]
-    rgb = np.clip(rgb * 255, 0, 255)
+    rgb *= 255
+    np.clip(rgb, 0, 255, out=rgb)
     
-    return rgb
\ No newline at end of file
+    return _from_soa(rgb, out)
\ No newline at end of file
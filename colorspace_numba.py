@@ -0,0 +1,107 @@
+import math
+
+import numpy as np
+from numba import njit, prange
+
+# Module-level float constants are frozen into the kernels at compile time,
+# letting LLVM constant-fold them.
+
+# sRGB (D65) to XYZ, rows pre-divided by the D65 white point
+_XR = 0.4124564 / 0.95047
+_XG = 0.3575761 / 0.95047
+_XB = 0.1804375 / 0.95047
+_YR = 0.2126729
+_YG = 0.7151522
+_YB = 0.0721750
+_ZR = 0.0193339 / 1.08883
+_ZG = 0.1191920 / 1.08883
+_ZB = 0.9503041 / 1.08883
+
+# XYZ to sRGB (D65), columns pre-multiplied by the D65 white point
+_RX = 3.2404542 * 0.95047
+_RY = -1.5371385
+_RZ = -0.4985314 * 1.08883
+_GX = -0.9692660 * 0.95047
+_GY = 1.8760108
+_GZ = 0.0415560 * 1.08883
+_BX = 0.0556434 * 0.95047
+_BY = -0.2040259
+_BZ = 1.0572252 * 1.08883
+
+_INV_255 = 1.0 / 255.0
+_THIRD = 1.0 / 3.0
+_INV_GAMMA = 1.0 / 2.4
+_LAB_OFFSET = 16.0 / 116.0
+
+
+@njit(fastmath=True, inline='always')
+def _srgb_to_linear(c):
+    if c > 0.04045:
+        return math.pow((c + 0.055) / 1.055, 2.4)
+    return c / 12.92
+
+
+@njit(fastmath=True, inline='always')
+def _linear_to_srgb(c):
+    if c > 0.0031308:
+        c = 1.055 * math.pow(c, _INV_GAMMA) - 0.055
+    else:
+        c = 12.92 * c
+    c *= 255.0
+    if c < 0.0:
+        return 0.0
+    if c > 255.0:
+        return 255.0
+    return c
+
+
+@njit(fastmath=True, inline='always')
+def _lab_f(t):
+    if t > 0.008856:
+        return np.cbrt(t)
+    return 7.787 * t + _LAB_OFFSET
+
+
+@njit(fastmath=True, inline='always')
+def _lab_f_inv(t):
+    if t > 0.2068966:
+        return t * t * t
+    return (t - _LAB_OFFSET) / 7.787
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def rgb_to_lab_kernel(rgb, lab_out):
+    """Convert an (H, W, 3) RGB array in [0, 255] to LAB, writing into lab_out."""
+    height, width = rgb.shape[0], rgb.shape[1]
+    for i in prange(height):
+        for j in range(width):
+            r = _srgb_to_linear(rgb[i, j, 0] * _INV_255)
+            g = _srgb_to_linear(rgb[i, j, 1] * _INV_255)
+            b = _srgb_to_linear(rgb[i, j, 2] * _INV_255)
+
+            fx = _lab_f(_XR * r + _XG * g + _XB * b)
+            fy = _lab_f(_YR * r + _YG * g + _YB * b)
+            fz = _lab_f(_ZR * r + _ZG * g + _ZB * b)
+
+            lab_out[i, j, 0] = 116.0 * fy - 16.0
+            lab_out[i, j, 1] = 500.0 * (fx - fy)
+            lab_out[i, j, 2] = 200.0 * (fy - fz)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def lab_to_rgb_kernel(lab, rgb_out):
+    """Convert an (H, W, 3) LAB array to RGB in [0, 255], writing into rgb_out."""
+    height, width = lab.shape[0], lab.shape[1]
+    for i in prange(height):
+        for j in range(width):
+            fy = (lab[i, j, 0] + 16.0) / 116.0
+            fx = lab[i, j, 1] / 500.0 + fy
+            fz = fy - lab[i, j, 2] / 200.0
+
+            x = _lab_f_inv(fx)
+            y = _lab_f_inv(fy)
+            z = _lab_f_inv(fz)
+
+            rgb_out[i, j, 0] = _linear_to_srgb(_RX * x + _RY * y + _RZ * z)
+            rgb_out[i, j, 1] = _linear_to_srgb(_GX * x + _GY * y + _GZ * z)
+            rgb_out[i, j, 2] = _linear_to_srgb(_BX * x + _BY * y + _BZ * z)
@@ -0,0 +1,58 @@
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: Required package not installed.")
+    print("Please run: pip install numpy")
+    sys.exit(1)
+
+# Optional Numba kernel; fall back to the NumPy implementation without it
+try:
+    from dither_numba import dither_kernel
+except ImportError:
+    dither_kernel = None
+
+def apply_dither(img, noise, amplitude, out=None):
+    """
+    Add noise to an image and clip the result to [0, 255].
+    
+    With Numba available the add, clip and store are fused into a single
+    pass over the image; uint8 output is truncated, i.e. floored.
+    
+    Args:
+        img: numpy array with shape (height, width, channels)
+        noise: numpy array with values in range [0, 1] and shape (height, width)
+        amplitude: Peak-to-peak noise amplitude; noise is centered around 0
+        out: numpy array with the same shape as img to write the result into
+             (uint8 for quantized output, float32 to keep working in float);
+             may be img itself; a new uint8 array is allocated if omitted
+    
+    Returns:
+        out
+    """
+    if out is None:
+        out = np.empty(img.shape, dtype=np.uint8)
+    
+    # Keep the arithmetic in float32
+    amplitude = np.float32(amplitude)
+    
+    if dither_kernel is not None:
+        dither_kernel(img, noise, amplitude, out)
+        return out
+    
+    # Fold the centering into a scalar so scaling the noise takes a single
+    # temporary; noise may be a read-only cached array, so it is never
+    # written to. A singleton channel axis lets broadcasting apply the noise
+    # to all image channels without replicating it
+    noise_scaled = np.multiply(noise, amplitude)[:, :, np.newaxis]
+    noise_scaled -= np.float32(0.5) * amplitude
+    if out.dtype == np.uint8:
+        dithered = np.add(img, noise_scaled, dtype=np.float32)
+        np.clip(dithered, 0, 255, out=dithered)
+        np.copyto(out, dithered, casting='unsafe')
+    else:
+        np.add(img, noise_scaled, out=out)
+        np.clip(out, 0, 255, out=out)
+    
+    return out
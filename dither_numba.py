@@ -0,0 +1,23 @@
+import numpy as np
+from numba import njit, prange
+
+# float32 constants keep the per-pixel math in single precision
+_HALF = np.float32(0.5)
+_MIN = np.float32(0.0)
+_MAX = np.float32(255.0)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def dither_kernel(img, noise, amplitude, out):
+    """Add centered noise to img, clip to [0, 255] and write into out in one pass."""
+    height, width, channels = img.shape
+    for y in prange(height):
+        for x in range(width):
+            n = (noise[y, x] - _HALF) * amplitude
+            for c in range(channels):
+                v = img[y, x, c] + n
+                if v < _MIN:
+                    v = _MIN
+                elif v > _MAX:
+                    v = _MAX
+                out[y, x, c] = v
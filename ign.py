@@ -1,3 +1,4 @@
+import functools
 import sys
 
 try:
@@ -7,6 +8,16 @@ except ImportError:
     print("Please run: pip install numpy")
     sys.exit(1)
 
+# Optional Numba kernel; fall back to the NumPy implementation without it
+try:
+    from ign_numba import ign_kernel
+except ImportError:
+    ign_kernel = None
+
+# Noise tiles are generated with dimensions rounded up to a multiple of this,
+# so images of similar size in a batch share one cached tile
+TILE_ALIGN = 256
+
 def generate_ign_noise(width, height, scale=1, seed=0):
     """
     Generate Interleaved Gradient Noise pattern.
@@ -14,6 +25,9 @@ def generate_ign_noise(width, height, scale=1, seed=0):
     Based on Jorge Jimenez's formula from "Next Generation Post Processing in Call of Duty"
     Formula: frac(52.9829189 * frac(0.06711056 * x + 0.00583715 * y))
     
+    IGN only depends on absolute pixel coordinates, so the result is a view
+    into a cached, read-only tile that is shared between calls.
+    
     Args:
         width: Width of the noise texture
         height: Height of the noise texture
@@ -21,20 +35,49 @@ def generate_ign_noise(width, height, scale=1, seed=0):
         seed: Offset for noise coordinates to vary the pattern (default: 0)
     
     Returns:
-        numpy array with values in range [0, 1]
+        read-only float32 numpy array with values in range [0, 1]
     """
     if seed == -1:
         seed = np.random.randint(0,1000)
+    
+    tile_width = -(-width // TILE_ALIGN) * TILE_ALIGN
+    tile_height = -(-height // TILE_ALIGN) * TILE_ALIGN
+    tile = _ign_tile(tile_width, tile_height, scale, int(seed))
+    
+    return tile[:height, :width]
+
 
-    # Create coordinate grids with seed offset
-    x = np.arange(width).reshape(1, -1) + seed
-    y = np.arange(height).reshape(-1, 1) + seed
+# One tile per dither pass: full-size tiles are large (~100 MB for a 24 MP
+# photo) and every batch worker process keeps its own cache
+@functools.lru_cache(maxsize=2)
+def _ign_tile(width, height, scale, seed):
+    """Generate a read-only IGN tile (cached per size, scale and seed)."""
+    if ign_kernel is not None:
+        noise = np.empty((height, width), dtype=np.float32)
+        ign_kernel(width, height, 1.0 / scale, seed, noise)
+    else:
+        noise = _ign_numpy(width, height, scale, seed)
     
-    # Apply IGN formula with scale
-    x_scaled = x / scale
-    y_scaled = y / scale
+    noise.flags.writeable = False
+    return noise
+
+
+def _ign_numpy(width, height, scale, seed):
+    """Generate an IGN tile with NumPy."""
+    # IGN is separable under frac(a + b) == frac(frac(a) + frac(b)), so the
+    # per-axis terms are reduced to 1-D fractional tables (in float64 for
+    # precision, then stored as float32) before a single broadcast add
+    x = 0.06711056 * (np.arange(width) + seed) / scale
+    x -= np.floor(x)
+    y = 0.00583715 * (np.arange(height) + seed) / scale
+    y -= np.floor(y)
     
-    f = 0.06711056 * x_scaled + 0.00583715 * y_scaled
-    noise = np.modf(52.9829189 * np.modf(f)[0])[0]
+    # Apply IGN formula in place, reusing one scratch buffer for the floors
+    noise = x.astype(np.float32).reshape(1, -1) + y.astype(np.float32).reshape(-1, 1)
+    scratch = np.floor(noise)
+    noise -= scratch
+    noise *= np.float32(52.9829189)
+    np.floor(noise, out=scratch)
+    noise -= scratch
     
     return noise
\ No newline at end of file
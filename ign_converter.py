@@ -31,6 +31,9 @@ Examples:
     %(prog)s /path/to/image.jpg -p system
     %(prog)s /path/to/image.jpg --palette system -n 2 -s 0.01
 
+  Fastest PNG saving:
+    %(prog)s -d /path/to/images/ -o /path/to/output/ --png-level 1
+
   Advanced debanding options:
     %(prog)s /path/to/image.jpg --preblur 0.5 --seed 42 --twopass --colorspace lab
     %(prog)s /path/to/image.jpg -pb 1.0 -sd 100 -tp -cs lab -s 0.008
@@ -157,6 +160,17 @@ quantization. Advanced options include:
         help='Color space for processing: rgb (default) or lab (perceptually uniform)'
     )
     
+    parser.add_argument(
+        '-pl',
+        '--png-level',
+        dest='png_level',
+        type=int,
+        default=6,
+        choices=range(0, 10),
+        metavar='[0-9]',
+        help='PNG zlib compression level; lower saves faster, higher gives smaller files (default: 6)'
+    )
+    
     args = parser.parse_args()
     
     # Validate strength
@@ -197,7 +211,7 @@ quantization. Advanced options include:
             return 1
         success = process_single_image(args.input_file, args.output, args.noise_scale, args.strength, 
                                       args.blur_radius, args.palette_mode, args.normalize, args.preblur, 
-                                      args.seed, args.twopass, args.colorspace, args.use_hash)
+                                      args.seed, args.twopass, args.colorspace, args.use_hash, args.png_level)
     else:
         # Batch directory mode
         input_path = Path(args.input_dir)
@@ -209,7 +223,7 @@ quantization. Advanced options include:
             return 1
         success = process_directory(args.input_dir, args.output, args.noise_scale, args.strength, 
                                    args.blur_radius, args.palette_mode, args.normalize, args.preblur, 
-                                   args.seed, args.twopass, args.colorspace, args.use_hash)
+                                   args.seed, args.twopass, args.colorspace, args.use_hash, args.png_level)
     
     return 0 if success else 1
 
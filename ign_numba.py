@@ -0,0 +1,21 @@
+import math
+
+from numba import njit, prange
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def ign_kernel(width, height, inv_scale, seed, out):
+    """
+    Write the (height, width) Interleaved Gradient Noise pattern into out.
+    
+    The scale is passed as its reciprocal so the inner loop only multiplies.
+    The loop is bound by writing out, so kernels specialized per scale
+    measured no faster.
+    """
+    for y in prange(height):
+        base = 0.00583715 * (y + seed) * inv_scale
+        for x in range(width):
+            f = 0.06711056 * (x + seed) * inv_scale + base
+            f -= math.floor(f)
+            v = 52.9829189 * f
+            out[y, x] = v - math.floor(v)
@@ -1,5 +1,9 @@
+import functools
 import hashlib
+import sys
+from pathlib import Path
 from colorspace_conversion import rgb_to_lab, lab_to_rgb
+from dither import apply_dither
 from ign import generate_ign_noise
 
 try:
@@ -10,9 +14,20 @@ except ImportError:
     print("Please run: pip install pillow numpy")
     sys.exit(1)
 
+# Optional Numba kernel; fall back to the NumPy implementation without it
+try:
+    from palette_numba import palette_lut_kernel
+except ImportError:
+    palette_lut_kernel = None
+
 # Common image extensions to process
 SUPPORTED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tiff', '.tif', '.gif'}
 
+# Gaussian blur radii below this leave 8-bit images unchanged in PIL (the
+# first visible change appears around 0.077), but still cost a full filter
+# pass, so smaller radii are skipped
+MIN_BLUR_RADIUS = 0.05
+
 # Windows system default 8bpp palette (256 colors)
 # First 10 and last 10 are system reserved colors
 WINDOWS_SYSTEM_PALETTE = [
@@ -59,8 +74,71 @@ WINDOWS_SYSTEM_PALETTE.extend([
     (255, 255, 255),     # 255: white
 ])
 
+# Windows system palette as an array, indexed by palette entry
+SYSTEM_PALETTE_RGB = np.array(WINDOWS_SYSTEM_PALETTE, dtype=np.uint8)
+
+# Bits per channel of the nearest system palette color lookup table (64^3 cells)
+PALETTE_LUT_BITS = 6
+
+@functools.lru_cache(maxsize=None)
+def _system_palette_lut():
+    """
+    Build the lookup table mapping each cell of a 64x64x64 RGB grid to the
+    nearest system palette color, measured from the cell center.
+    
+    Returns:
+        uint8 numpy array with shape (64 * 64 * 64, 3), indexed by r << 12 | g << 6 | b
+    """
+    levels = 1 << PALETTE_LUT_BITS
+    step = 256 // levels
+    centers = np.arange(levels, dtype=np.float32) * step + (step - 1) / 2
+    palette = SYSTEM_PALETTE_RGB.astype(np.float32)
+    
+    # |c - p|^2 = |c|^2 - 2 c.p + |p|^2, where |c|^2 doesn't affect the argmin
+    cells = np.stack(np.meshgrid(centers, centers, indexing='ij'), axis=-1).reshape(-1, 2)
+    palette_norm = (palette ** 2).sum(axis=1)
+    nearest = np.empty((levels, levels * levels), dtype=np.uint8)
+    for r, red in enumerate(centers):
+        # One red slice at a time keeps the distance matrix small
+        dist = palette_norm - 2 * (red * palette[:, 0] + cells @ palette[:, 1:].T)
+        nearest[r] = dist.argmin(axis=1)
+    
+    return SYSTEM_PALETTE_RGB[nearest.ravel()]
+
+
+def map_to_system_palette(rgb, out=None):
+    """
+    Replace every pixel with its nearest Windows system palette color.
+    
+    With Numba available the cell index and the table lookup are fused into
+    a single pass over the image.
+    
+    Args:
+        rgb: uint8 numpy array with shape (height, width, 3)
+        out: uint8 numpy array with the same shape as rgb to write the
+             result into (may be rgb itself); allocated if omitted
+    
+    Returns:
+        out
+    """
+    if out is None:
+        out = np.empty(rgb.shape, dtype=np.uint8)
+    
+    if palette_lut_kernel is not None:
+        palette_lut_kernel(rgb, _system_palette_lut(), PALETTE_LUT_BITS, out)
+        return out
+    
+    cells = rgb >> (8 - PALETTE_LUT_BITS)
+    index = cells[:, :, 0].astype(np.intp)
+    index <<= PALETTE_LUT_BITS
+    index |= cells[:, :, 1]
+    index <<= PALETTE_LUT_BITS
+    index |= cells[:, :, 2]
+    return np.take(_system_palette_lut(), index, axis=0, out=out)
+
+
 def convert_image(input_path, output_path, noise_scale, strength, blur_radius, palette_mode,
-                 normalize, preblur, seed, twopass, colorspace, use_hash=False):
+                 normalize, preblur, seed, twopass, colorspace, use_hash=False, png_level=6):
     """
     Convert a single image to 8-bit PNG with interleaved gradient noise dithering.
     
@@ -77,6 +155,7 @@ def convert_image(input_path, output_path, noise_scale, strength, blur_radius, p
         twopass: Use two-pass quantization
         colorspace: 'rgb' or 'lab' for processing color space
         use_hash: If True, use MD5 hash as filename
+        png_level: PNG zlib compression level (0-9); None runs the slower optimize pass
     """
     try:
         # Load image
@@ -93,97 +172,84 @@ def convert_image(input_path, output_path, noise_scale, strength, blur_radius, p
             img = background
         
         # Apply pre-blur if specified
-        if preblur > 0:
+        if preblur >= MIN_BLUR_RADIUS:
             img = img.filter(ImageFilter.GaussianBlur(radius=preblur))
         
-        # Store original image for palette generation (only needed for system palette)
-        original_img = img.copy() if palette_mode == 'system' else None
-        
-        # Convert to numpy array (float for processing)
-        img_array = np.array(img, dtype=np.float32)
-        
-        # Convert to LAB color space if specified
+        # Convert to numpy array, going to LAB color space straight from the
+        # 8-bit pixels if specified. Only normalization needs a float copy of
+        # the RGB pixels; dithering reads the 8-bit pixels directly.
         if colorspace == 'lab':
-            img_array = rgb_to_lab(img_array)
+            img_array = rgb_to_lab(np.asarray(img))
+        elif normalize:
+            img_array = np.array(img, dtype=np.float32)
+        else:
+            img_array = np.asarray(img)
         
-        # Normalize img_array range
+        # Normalize img_array range in place (a single-valued image is left as is)
         if normalize:
             img_array_min = img_array.min()
             img_array_max = img_array.max()
-            img_array = (img_array - img_array_min) / (img_array_max - img_array_min) * 255
+            if img_array_max > img_array_min:
+                img_array -= img_array_min
+                img_array *= 255 / (img_array_max - img_array_min)
         
         # Generate IGN noise for dithering with seed
         noise = generate_ign_noise(img.width, img.height, noise_scale, seed)
+        assert noise.dtype == np.float32
         
-        # Expand noise to match image channels (RGB or LAB)
-        noise = np.expand_dims(noise, axis=2)
-        noise = np.tile(noise, (1, 1, 3))
-        
-        # Apply dithering: add noise before quantization
+        # Apply dithering: add noise before quantization and clip to valid range
         # Scale noise from [0,1] to [-strength*255, +strength*255]
-        noise_scaled = (noise - 0.5) * 2 * strength * 255
-        dithered = img_array + noise_scaled
-        
-        # Clip to valid range
-        dithered = np.clip(dithered, 0, 255)
-        
-        # Convert back to RGB if we were in LAB
+        amplitude = 2.0 * strength * 255.0
         if colorspace == 'lab':
+            # Dither in place, then convert back to RGB
+            dithered = apply_dither(img_array, noise, amplitude, out=img_array)
             dithered = lab_to_rgb(dithered)
-        
-        # Quantize to 8-bit
-        quantized = np.floor(dithered).astype(np.uint8)
-        
-        # Convert back to PIL Image
-        result_img = Image.fromarray(quantized, 'RGB')
+            
+            # Quantize to 8-bit (values are non-negative, so truncation == floor)
+            quantized = dithered.astype(np.uint8)
+        else:
+            # Dither, clip and quantize to 8-bit in one pass
+            quantized = apply_dither(img_array, noise, amplitude)
         
         # Apply palette quantization ONLY for system palette mode
         # Adaptive mode keeps full 8-bit per channel (16.7M colors)
         if palette_mode == 'system':
-            # Use Windows system palette
-            system_palette_img = Image.new('P', (1, 1))
-            # Flatten the palette list for PIL (needs R,G,B,R,G,B,...)
-            flat_palette = []
-            for r, g, b in WINDOWS_SYSTEM_PALETTE:
-                flat_palette.extend([r, g, b])
-            system_palette_img.putpalette(flat_palette)
-            
-            # Convert image to use the system palette
-            result_img = result_img.quantize(palette=system_palette_img, dither=Image.NONE)
-            # Convert back to RGB mode
-            result_img = result_img.convert('RGB')
+            map_to_system_palette(quantized, out=quantized)
         
         # Two-pass quantization if enabled
         if twopass:
-            # Convert back to numpy for second pass
-            img_array_2 = np.array(result_img, dtype=np.float32)
-            
             # Generate second noise with different scale and lighter strength
             noise_2 = generate_ign_noise(img.width, img.height, noise_scale * 2, seed + 100)
-            noise_2 = np.expand_dims(noise_2, axis=2)
-            noise_2 = np.tile(noise_2, (1, 1, 3))
-            
-            # Apply lighter second pass dithering
-            noise_scaled_2 = (noise_2 - 0.5) * 2 * (strength * 0.3) * 255
-            dithered_2 = img_array_2 + noise_scaled_2
-            dithered_2 = np.clip(dithered_2, 0, 255)
-            quantized_2 = np.floor(dithered_2).astype(np.uint8)
             
-            result_img = Image.fromarray(quantized_2, 'RGB')
+            # Apply lighter second pass dithering, overwriting the first pass
+            # output in place
+            apply_dither(quantized, noise_2, 2.0 * strength * 0.3 * 255.0, out=quantized)
             
             # Re-apply palette quantization only for system mode
             if palette_mode == 'system':
-                result_img = result_img.quantize(palette=system_palette_img, dither=Image.NONE)
-                result_img = result_img.convert('RGB')
+                map_to_system_palette(quantized, out=quantized)
         
-        # Apply gaussian blur to final image if radius > 0
-        if blur_radius > 0:
+        # Convert back to PIL Image once, after all array passes (PIL stores
+        # RGB with 4 bytes per pixel, so this copies even through
+        # Image.frombuffer)
+        result_img = Image.fromarray(quantized, 'RGB')
+        
+        # Apply gaussian blur to final image if it would change anything
+        # PIL implements GaussianBlur as separable box blur passes, so its cost
+        # does not grow with the radius
+        blurred = blur_radius >= MIN_BLUR_RADIUS
+        if blurred:
             result_img = result_img.filter(ImageFilter.GaussianBlur(radius=blur_radius))
         
         # Determine final output path
         if use_hash:
-            # Calculate MD5 hash of the final image
-            img_bytes = result_img.tobytes()
+            # Calculate MD5 hash of the final image, feeding the pixel array
+            # to hashlib without copying it; only a blurred image has to be
+            # read back from PIL
+            if blurred:
+                img_bytes = result_img.tobytes()
+            else:
+                img_bytes = memoryview(quantized)
             md5_hash = hashlib.md5(img_bytes).hexdigest()
             
             # output_path is actually the directory in this case
@@ -193,7 +259,10 @@ def convert_image(input_path, output_path, noise_scale, strength, blur_radius, p
             final_output = output_path
         
         # Save as PNG
-        result_img.save(final_output, 'PNG', optimize=True)
+        if png_level is None:
+            result_img.save(final_output, 'PNG', optimize=True)
+        else:
+            result_img.save(final_output, 'PNG', compress_level=png_level)
         
         return True, final_output
         
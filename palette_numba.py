@@ -0,0 +1,16 @@
+from numba import njit, prange
+
+
+@njit(parallel=True, cache=True)
+def palette_lut_kernel(rgb, lut, bits, out):
+    """Map each pixel of rgb through the flat (r, g, b) cell lookup table into out."""
+    height, width = rgb.shape[0], rgb.shape[1]
+    shift = 8 - bits
+    for y in prange(height):
+        for x in range(width):
+            index = (((rgb[y, x, 0] >> shift) << (2 * bits))
+                     | ((rgb[y, x, 1] >> shift) << bits)
+                     | (rgb[y, x, 2] >> shift))
+            out[y, x, 0] = lut[index, 0]
+            out[y, x, 1] = lut[index, 1]
+            out[y, x, 2] = lut[index, 2]
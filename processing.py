@@ -1,8 +1,27 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from image_converter import  convert_image
+import numpy as np
+from image_converter import SUPPORTED_EXTENSIONS, convert_image
+
+
+def _init_worker(numba_threads):
+    """Set up a worker process for batch conversion."""
+    # Forked workers inherit the parent's NumPy RNG state; reseed so that
+    # random seeds (-sd -1) differ between images handled by different workers
+    np.random.seed()
+    
+    # Split the cores between the workers to avoid oversubscription
+    try:
+        import numba
+    except ImportError:
+        return
+    # Numba may be capped below os.cpu_count() (NUMBA_NUM_THREADS, CPU affinity)
+    numba.set_num_threads(min(numba_threads, numba.config.NUMBA_NUM_THREADS))
+
 
 def process_single_image(input_path, output_dir, noise_scale, strength, blur_radius, palette_mode,
-                        normalize, preblur, seed, twopass, colorspace, use_hash):
+                        normalize, preblur, seed, twopass, colorspace, use_hash, png_level=6):
     """Process a single image file."""
     input_file = Path(input_path)
     
@@ -30,9 +49,10 @@ def process_single_image(input_path, output_dir, noise_scale, strength, blur_rad
     
     print(f"Converting: {input_file.name}")
     print(f"Settings: Scale={noise_scale}px, Strength={strength}, Blur={blur_radius}, Palette={palette_mode}")
-    print(f"          Normalize={normalize}, PreBlur={preblur}, Seed={seed}, TwoPass={twopass}, ColorSpace={colorspace}, Hash={use_hash}")
+    print(f"          Normalize={normalize}, PreBlur={preblur}, Seed={seed}, TwoPass={twopass}, ColorSpace={colorspace}, Hash={use_hash}, PNGLevel={png_level}")
     success, final_path = convert_image(input_file, output_path, noise_scale, strength, blur_radius, 
-                                       palette_mode, normalize, preblur, seed, twopass, colorspace, use_hash)
+                                       palette_mode, normalize, preblur, seed, twopass, colorspace, use_hash,
+                                       png_level)
     
     if success:
         print(f"✓ Successfully converted to: {final_path}")
@@ -42,7 +62,7 @@ def process_single_image(input_path, output_dir, noise_scale, strength, blur_rad
 
 
 def process_directory(input_dir, output_dir, noise_scale, strength, blur_radius, palette_mode, 
-                     normalize, preblur, seed, twopass, colorspace, use_hash):
+                     normalize, preblur, seed, twopass, colorspace, use_hash, png_level=6):
     """Process all images in a directory."""
     input_path = Path(input_dir)
     
@@ -61,11 +81,12 @@ def process_directory(input_dir, output_dir, noise_scale, strength, blur_radius,
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # Find all supported images
-    image_files = []
-    for ext in SUPPORTED_EXTENSIONS:
-        image_files.extend(input_path.glob(f"*{ext}"))
-        image_files.extend(input_path.glob(f"*{ext.upper()}"))
+    # Find all supported images in a single directory scan; matching the
+    # lowercased suffix also catches mixed-case extensions and never lists
+    # a file twice on case-insensitive filesystems
+    with os.scandir(input_path) as entries:
+        image_files = [Path(entry.path) for entry in entries
+                       if entry.is_file() and os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS]
     
     if not image_files:
         print(f"No supported images found in: {input_dir}")
@@ -75,22 +96,46 @@ def process_directory(input_dir, output_dir, noise_scale, strength, blur_radius,
     print(f"Found {len(image_files)} image(s) to convert")
     print(f"Output directory: {output_path}")
     print(f"Settings: Scale={noise_scale}px, Strength={strength}, Blur={blur_radius}, Palette={palette_mode}")
-    print(f"          Normalize={normalize}, PreBlur={preblur}, Seed={seed}, TwoPass={twopass}, ColorSpace={colorspace}, Hash={use_hash}\n")
+    print(f"          Normalize={normalize}, PreBlur={preblur}, Seed={seed}, TwoPass={twopass}, ColorSpace={colorspace}, Hash={use_hash}, PNGLevel={png_level}\n")
     
     success_count = 0
     fail_count = 0
     
-    for img_file in sorted(image_files):
-        print(f"Converting: {img_file.name}")
+    # Images are independent, so convert them in parallel worker processes;
+    # cores not needed for a worker of their own go to the Numba kernels
+    cpu_count = os.cpu_count() or 1
+    workers = min(cpu_count, len(image_files))
+    numba_threads = max(1, cpu_count // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(numba_threads,)) as executor:
+        futures = []
+        for img_file in sorted(image_files):
+            # With hashing enabled the output directory is passed as-is
+            file_output = output_path if use_hash else output_path / f"{img_file.stem}_ignpy.png"
+            future = executor.submit(convert_image, img_file, file_output, noise_scale, strength, blur_radius,
+                                     palette_mode, normalize, preblur, seed, twopass, colorspace, use_hash,
+                                     png_level)
+            futures.append((img_file, future))
         
-        success, final_path = convert_image(img_file, output_path, noise_scale, strength, blur_radius, 
-                                           palette_mode, normalize, preblur, seed, twopass, colorspace, use_hash)
-        if success:
-            success_count += 1
-            print(f"✓ Success -> {final_path.name}\n")
-        else:
-            fail_count += 1
-            print(f"✗ Failed\n")
+        # Report results in file order, regardless of which worker finishes first
+        for img_file, future in futures:
+            print(f"Converting: {img_file.name}")
+            
+            # A worker that dies hard (e.g. killed when out of memory) breaks
+            # the pool; count its remaining files as failed instead of
+            # aborting the whole batch
+            try:
+                success, final_path = future.result()
+            except Exception as e:
+                print(f"Error converting {img_file}: {str(e)}")
+                success = False
+            
+            if success:
+                success_count += 1
+                print(f"✓ Success -> {final_path.name}\n")
+            else:
+                fail_count += 1
+                print(f"✗ Failed\n")
     
     print(f"Conversion complete: {success_count} succeeded, {fail_count} failed")
     return fail_count == 0
\ No newline at end of file